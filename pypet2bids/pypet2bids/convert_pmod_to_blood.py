@@ -10,26 +10,84 @@ PmodToBlood.
 | *Copyright: OpenNeuroPET team*
 """
 
+import csv
+import gzip
+import hashlib
 import json
 import logging
+import os
+import pickle
+import stat
 import textwrap
 
-import numpy
-import pandas
-import pandas as pd
 import argparse
 import warnings
 import re
 import ast
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from os.path import join
 
 # from pypet2bids.helper_functions import ParseKwargs, collect_bids_part, open_meta_data
 
-try:
-    import helper_functions
-except ModuleNotFoundError:
-    import pypet2bids.helper_functions as helper_functions
+# numpy, pandas, and the shared helper functions dominate this module's import time
+# but are only needed once blood data is actually being converted; they're pulled in
+# on demand by import_data_libraries so importing this module stays cheap
+numpy = None
+pandas = None
+helper_functions = None
+
+
+def import_data_libraries():
+    """
+    Imports numpy, pandas, and the pypet2bids helper functions into the module namespace
+    the first time a code path that touches blood data runs, sparing plain imports of
+    this module their combined startup cost.
+
+    :return: None
+    :rtype: None
+    """
+    global numpy, pandas, helper_functions
+    if helper_functions is not None:
+        return
+    import numpy
+    import pandas
+
+    try:
+        import helper_functions
+    except ModuleNotFoundError:
+        import pypet2bids.helper_functions as helper_functions
+
+
+# compiled once at import, applied to every radioactivity column header
+bracketed_units_pattern = re.compile(r"\[(.*?)\]")
+
+# int/float literals that type_cast_cli_input may convert directly; anything this
+# doesn't match (zero padded digits, containers, etc.) keeps its ast.literal_eval
+# semantics via the fallback
+number_pattern = re.compile(r"[+-]?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?$")
+
+# parsed pmod files keyed on (resolved path, mtime); repeat loads of an unchanged
+# file, e.g. across PmodToBlood instances in a batch run, reuse the parse and only
+# pay for a dataframe copy instead of re-opening the workbook
+loaded_pmod_file_cache = {}
+
+# invariant portion of the blood sidecar json; write_out_jsons copies the inner dicts per call
+# before filling in the run-specific units and any kwargs supplied fields
+blood_sidecar_template = {
+    "Time": {
+        "Description": "Time in relation to time zero defined by the _pet.json",
+        "Units": "s",
+    },
+    "whole_blood_radioactivity": {
+        "Description": "Radioactivity in whole blood samples.",
+        "Units": None,
+    },
+    "metabolite_parent_fraction": {
+        "Description": "Parent fraction of the radiotracer",
+        "Units": "arbitrary",
+    },
+}
 
 epilog = textwrap.dedent(
     """
@@ -121,6 +179,8 @@ def cli():
     :rtype: argparse.namespace
 
     """
+    # the kwargs argument below leans on helper_functions.ParseKwargs
+    import_data_libraries()
     parser = argparse.ArgumentParser(
         formatter_class=argparse.RawDescriptionHelpFormatter,
         description="Converts PMOD blood files to PET BIDS compliant tsv's and json "
@@ -185,6 +245,32 @@ def cli():
         help="Show additional examples (verbose) of how to use this interface.",
         action="store_true",
     )
+    parser.add_argument(
+        "--gzip",
+        "-g",
+        help="Gzip the output blood tsv files (writes .tsv.gz instead of .tsv).",
+        action="store_true",
+    )
+    # collection-method flags skip the interactive sampling prompts entirely,
+    # letting batch pipelines run without a human on stdin
+    parser.add_argument(
+        "--whole-blood-activity-collection-method",
+        help="How the whole blood activity was sampled; skips the interactive prompt.",
+        choices=["manual", "automatic"],
+        default=None,
+    )
+    parser.add_argument(
+        "--parent-fraction-collection-method",
+        help="How the parent fraction was sampled; skips the interactive prompt.",
+        choices=["manual", "automatic"],
+        default=None,
+    )
+    parser.add_argument(
+        "--plasma-activity-collection-method",
+        help="How the plasma activity was sampled; skips the interactive prompt.",
+        choices=["manual", "automatic"],
+        default=None,
+    )
 
     args = parser.parse_args()
 
@@ -200,6 +286,23 @@ def type_cast_cli_input(kwarg_arg):
     :return: kwarg argument evaluated to python datatype
     :rtype: dict, list, str, int, float, bool
     """
+    # values that already arrived as python types (e.g. passed programmatically
+    # rather than from the command line) need no evaluation
+    if not isinstance(kwarg_arg, str):
+        return kwarg_arg
+    # cheap probes covering the overwhelmingly common cli inputs, bare booleans and
+    # numbers, without paying for the ast parser; everything else falls through to
+    # literal_eval below so containers, None, quoted strings etc. behave as before
+    lowered_kwarg_arg = kwarg_arg.lower()
+    if lowered_kwarg_arg in ("true", "t", "yes"):
+        return True
+    if lowered_kwarg_arg in ("false", "f", "no"):
+        return False
+    if number_pattern.match(kwarg_arg):
+        try:
+            return int(kwarg_arg)
+        except ValueError:
+            return float(kwarg_arg)
     try:
         var = ast.literal_eval(kwarg_arg)
         if type(var) in [dict, list, str, int, float, bool]:
@@ -226,6 +329,8 @@ class PmodToBlood:
     :type output_path: pathlib.Path
     :param output_json: boolean specifying whether to output a json sidecar for the blood files, default is false
     :type output_json: bool
+    :param gzip_output: write the blood tsv files gzipped (as .tsv.gz), default is false
+    :type gzip_output: bool
     :param engine: soon to be deprecated, determines what engine is used in pandas.read_excel
     :type engine: str
     :param kwargs: additional plasma/blood/radioactivity key/pair BIDS arguments, not required but if provided used during
@@ -240,9 +345,12 @@ class PmodToBlood:
         plasma_activity: Path = Path(),
         output_path: Path = None,
         output_json: bool = False,
+        gzip_output: bool = False,
         engine="",
         **kwargs,
     ):
+        import_data_libraries()
+        self.gzip_output = gzip_output
 
         if kwargs:
             try:
@@ -257,8 +365,9 @@ class PmodToBlood:
         self.atol = 0.02
 
         # cast input from kwargs
-        for key, value in self.kwargs.items():
-            self.kwargs[key] = type_cast_cli_input(value)
+        self.kwargs = {
+            key: type_cast_cli_input(value) for key, value in self.kwargs.items()
+        }
 
         self.units = None
         self.engine = engine
@@ -274,62 +383,90 @@ class PmodToBlood:
         else:
             self.output_path = Path(whole_blood_activity).parent
 
-        # check the output name for subject and session id
-        if helper_functions.collect_bids_part("sub", str(self.output_path)):
-            self.subject_id = helper_functions.collect_bids_part(
-                "sub", self.output_path
-            )
-        else:
+        # check the output name for subject and session id, parsing the path once per entity
+        self.subject_id = helper_functions.collect_bids_part(
+            "sub", str(self.output_path)
+        )
+        if not self.subject_id:
             print("Subject id not found in output_path, checking key pair input.")
             self.subject_id = self.kwargs.get("subject_id", "")
 
-        if helper_functions.collect_bids_part("ses", str(self.output_path)):
-            self.session_id = helper_functions.collect_bids_part(
-                "ses", self.output_path
-            )
-        else:
+        self.session_id = helper_functions.collect_bids_part(
+            "ses", str(self.output_path)
+        )
+        if not self.session_id:
             print("Session id not found in output_path, checking key pair input.")
             self.session_id = self.kwargs.get("session_id", "")
 
         self.output_json = output_json
 
+        # the tsv and json writers prefix their output files identically, so assemble that prefix once here
+        entities = [entity for entity in (self.subject_id, self.session_id) if entity]
+        self.file_path_prefix = join(
+            self.output_path, "_".join(entities) + "_" if entities else ""
+        )
+
         self.auto_sampled = []
         self.manually_sampled = []
+        # blood_series maps measurement names to pandas DataFrames and stays pandas
+        # end to end: the column classification, de-duplication bookkeeping, and
+        # tsv emission all lean on labeled columns. Where the math is hot the code
+        # takes numpy views of individual columns rather than restructuring this
+        # container into raw arrays.
         self.blood_series = {}
         self.duplicates = (
             {}
         )  # list of times that are duplicated across manual and automatic samples
-
+        # boolean row masks produced by the duplicate scan, keyed like duplicates,
+        # reused when the duplicated rows are split out of their frames
+        self.duplicate_masks = {}
+        # (name, series) pairs for every fraction column, filled in lazily the first
+        # time check_fraction_is_fraction scans for them
+        self.fraction_series = None
+
+        input_files = {}
         if whole_blood_activity.is_file():
-            self.blood_series["whole_blood_activity"] = self.load_pmod_file(
-                whole_blood_activity, engine=self.engine
-            )
+            input_files["whole_blood_activity"] = whole_blood_activity
 
         if parent_fraction.is_file():
-            self.blood_series["parent_fraction"] = self.load_pmod_file(
-                parent_fraction, engine=self.engine
-            )
+            input_files["parent_fraction"] = parent_fraction
 
         self.multiply_plasma = False
         # plasma activity is not required, but is used if provided
         if plasma_activity.is_file():
-            self.blood_series["plasma_activity"] = self.load_pmod_file(
-                plasma_activity, engine=self.engine
-            )
+            input_files["plasma_activity"] = plasma_activity
             if "whole" in str.lower(plasma_activity.name) and "ratio" in str.lower(
                 plasma_activity.name
             ):
                 self.multiply_plasma = True
 
+        # parse the two or three inputs concurrently; the parsers release the gil
+        # during file reads and workbook decompression, and load_pmod_file shares
+        # no mutable state between distinct paths
+        if input_files:
+            with ThreadPoolExecutor(max_workers=len(input_files)) as executor:
+                loads = {
+                    name: executor.submit(
+                        self.load_pmod_file, input_file, engine=self.engine
+                    )
+                    for name, input_file in input_files.items()
+                }
+                for name, load in loads.items():
+                    self.blood_series[name] = load.result()
+
         # one may encounter data collected manually and/or automatically, we vary our logic depending on the case
         self.data_collection = {}
 
         for blood_sample in self.blood_series.keys():
             var = f"{blood_sample}_collection_method"
-            if not kwargs.get(var, None):
+            # look the method up in the flattened kwargs; the raw **kwargs dict only
+            # holds {'kwargs': {...}} when invoked through the cli, which meant
+            # cli-supplied collection methods never bypassed the prompt
+            collection_method = self.kwargs.get(var, None) or kwargs.get(var, None)
+            if not collection_method:
                 self.ask_recording_type(blood_sample)
             else:
-                self.data_collection[blood_sample] = kwargs.get(var)
+                self.data_collection[blood_sample] = collection_method
 
         for measure, collection_method in self.data_collection.items():
             if collection_method == "manual":
@@ -350,10 +487,18 @@ class PmodToBlood:
         # of each recording
         # self.deduplicate()
 
-        self.write_out_tsvs()
-
+        # the tsv and json writers touch disjoint files, so when both are wanted their
+        # file i/o is overlapped in a small thread pool
         if self.output_json:
-            self.write_out_jsons()
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                writes = [
+                    executor.submit(self.write_out_tsvs),
+                    executor.submit(self.write_out_jsons),
+                ]
+                for write in writes:
+                    write.result()
+        else:
+            self.write_out_tsvs()
 
     @staticmethod
     def load_pmod_file(pmod_blood_file: Path, engine=""):
@@ -367,13 +512,72 @@ class PmodToBlood:
         :return: contents of .bld file
         :rtype: pandas.DataFrame
         """
-        if pmod_blood_file.is_file() and pmod_blood_file.exists():
-            loaded_file = helper_functions.open_meta_data(pmod_blood_file)
+        import_data_libraries()
+        # a single stat both validates the input and supplies the cache key's
+        # mtime, instead of paying one syscall for is_file and another for stat
+        try:
+            file_stats = pmod_blood_file.stat()
+        except (FileNotFoundError, OSError):
+            file_stats = None
+        if file_stats is not None and stat.S_ISREG(file_stats.st_mode):
+            # the downstream checks mutate these frames (renames, de-duplication),
+            # so the cache keeps the pristine parse and hands out copies
+            cache_key = (
+                str(pmod_blood_file.resolve()),
+                file_stats.st_mtime,
+            )
+            cached = loaded_pmod_file_cache.get(cache_key)
+            if cached is not None:
+                return cached.copy()
+            with open(pmod_blood_file, "rb") as bld_file:
+                magic_bytes = bld_file.read(2)
+            if magic_bytes in (b"PK", b"\xd0\xcf"):
+                # a zip or OLE2 signature means this .bld really is an excel
+                # workbook; those are slow to parse, so when PET2BIDS_CACHE_BLOOD
+                # is set (same opt-in style as PET2BIDS_CACHE_ECAT) the parsed
+                # frame is pickled next to the input keyed on a content hash
+                loaded_file = None
+                blood_cache = os.environ.get("PET2BIDS_CACHE_BLOOD", 0) == "1"
+                if blood_cache:
+                    content_digest = hashlib.blake2b(
+                        pmod_blood_file.read_bytes()
+                    ).hexdigest()
+                    pickle_path = Path(str(pmod_blood_file) + ".cache.pickle")
+                    if pickle_path.is_file():
+                        with open(pickle_path, "rb") as pickle_file:
+                            cached_digest, cached_frame = pickle.load(pickle_file)
+                        if cached_digest == content_digest:
+                            loaded_file = cached_frame
+                if loaded_file is None:
+                    # hand the workbook to the engine probing in open_meta_data
+                    loaded_file = helper_functions.open_meta_data(pmod_blood_file)
+                    if blood_cache:
+                        with open(pickle_path, "wb") as pickle_file:
+                            pickle.dump(
+                                (content_digest, loaded_file),
+                                pickle_file,
+                                protocol=pickle.HIGHEST_PROTOCOL,
+                            )
+            else:
+                # native PMOD .bld files are tab separated text, read those with the
+                # pandas C parser directly instead of paying for a failed excel
+                # parse; anything without a tab in its header line keeps the
+                # python-engine separator sniffing so comma or space separated
+                # exports don't parse as a single column
+                with open(pmod_blood_file, "r") as text_file:
+                    first_line = text_file.readline()
+                if "\t" in first_line:
+                    loaded_file = pandas.read_csv(pmod_blood_file, sep="\t")
+                else:
+                    loaded_file = pandas.read_csv(
+                        pmod_blood_file, sep=None, engine="python"
+                    )
             # drop unnamed columns
             loaded_file = loaded_file.loc[
                 :, ~loaded_file.columns.str.contains("^Unnamed")
             ]
-            return loaded_file
+            loaded_pmod_file_cache[cache_key] = loaded_file
+            return loaded_file.copy()
         else:
             raise FileNotFoundError(str(pmod_blood_file))
 
@@ -387,35 +591,50 @@ class PmodToBlood:
         # if there is only a single input do nothing, else go through each file. This shouldn't get reached
         # as whole_blood_activity and plasma_activity are required
         if len(self.blood_series) >= 2 and len(set(self.data_collection.values())) == 1:
-            row_lengths = {}
-            for key, bld_data in self.blood_series.items():
-                row_lengths[key] = len(bld_data)
-
-            if len(set(row_lengths.values())) > 1:
+            # one set of lengths answers the consistency question; the per-file
+            # report is only assembled when the check actually fails
+            if len({len(bld_data) for bld_data in self.blood_series.values()}) > 1:
                 err_message = (
                     f"Sampling method for all PMOD blood files (.bld) given as "
                     f"{list(set(self.data_collection.values()))[0]} must be of the same dimensions"
                     f" row-wise!\n"
                 )
-                for key, value in row_lengths.items():
-                    err_message += f"{key} file has {value} rows\n"
+                for key, bld_data in self.blood_series.items():
+                    err_message += f"{key} file has {len(bld_data)} rows\n"
 
                 err_message += "Check input files are valid."
 
                 raise Exception(err_message)
 
-            # lastly make sure the same time points exist across each input file/dataframe
-            whole_blood_activity = self.blood_series.pop("whole_blood_activity")
+            # lastly make sure the same time points exist across each input file/dataframe;
+            # the whole blood entry is the reference, so it is skipped in place rather
+            # than popped out of and reinserted into the dict
+            whole_blood_activity = self.blood_series["whole_blood_activity"]
+            whole_blood_times = whole_blood_activity["time"].to_numpy()
+            whole_blood_time_bytes = whole_blood_times.tobytes()
             for key, dataframe in self.blood_series.items():
-                try:
-                    assert whole_blood_activity["time"].equals(dataframe["time"])
-                except AssertionError:
-                    raise AssertionError(
+                if key == "whole_blood_activity":
+                    continue
+                times = dataframe["time"].to_numpy()
+                # byte-identical arrays are the common consistent-input case; one
+                # memcmp of the raw buffers skips the tolerance math entirely
+                if (
+                    times.dtype == whole_blood_times.dtype
+                    and times.tobytes() == whole_blood_time_bytes
+                ):
+                    continue
+                # otherwise allclose short-circuits on the first mismatch and
+                # tolerates dtype/rounding differences between files that
+                # Series.equals would flag as unequal
+                if not numpy.allclose(
+                    whole_blood_times,
+                    times,
+                    rtol=self.rtol,
+                    atol=self.atol,
+                ):
+                    raise ValueError(
                         f"Time(s) must have same values between input files, check time columns."
                     )
-            # if it all checks out put the whole blood activity back into our blood series object
-            self.blood_series["whole_blood_activity"] = whole_blood_activity
-
         # checks to make sure that an auto-sampled file has more entries in it than a manually sampled file,
         # John Henry must lose.
         elif (
@@ -451,15 +670,14 @@ class PmodToBlood:
             # we want to make sure that in the case of mixed data we don't include manual time points in the autosampled
             # curves, first we find duplicates.
 
+            # dict.get evaluates its default eagerly, so share one empty frame
+            # instead of allocating a throwaway DataFrame per lookup
+            empty_frame = pandas.DataFrame()
             whole_blood_activity = self.blood_series.get(
-                "whole_blood_activity", pandas.DataFrame()
-            )
-            plasma_activity = self.blood_series.get(
-                "plasma_activity", pandas.DataFrame()
-            )
-            parent_fraction = self.blood_series.get(
-                "parent_fraction", pandas.DataFrame()
+                "whole_blood_activity", empty_frame
             )
+            plasma_activity = self.blood_series.get("plasma_activity", empty_frame)
+            parent_fraction = self.blood_series.get("parent_fraction", empty_frame)
             duplicates = {}
 
             # wp is short for whole blood and plasma activity, we're just using wp to make our conditional statements
@@ -473,18 +691,14 @@ class PmodToBlood:
             # case 1 whole blood time == plasma time && parent fraction time exists
             if (
                 len(wp["whole_blood_activity"]) == len(wp["plasma_activity"])
-                and parent_fraction
+                and len(parent_fraction) > 0
             ):
                 # get ready for duplicates
                 for key in wp.keys():
                     if self.data_collection.get(key) == "automatic":
                         duplicates[key] = []
 
-                for activity_series in duplicates.keys():
-                    for pf_time in parent_fraction.get("time", []):
-                        for activity_time in wp.get(key).get("time", []):
-                            if numpy.isclose(pf_time, activity_time, atol=self.atol):
-                                duplicates[activity_series].append(activity_time)
+                self.find_duplicate_times(parent_fraction, wp, duplicates)
 
             # case 2 whole blood time > plasma time && parent fraction time exists
             elif (
@@ -497,19 +711,23 @@ class PmodToBlood:
                         duplicates[key] = []
 
                 if len(wp["plasma_activity"]) == (len(parent_fraction) - 1):
+                    # grab the leading time points positionally once instead of
+                    # re-running label-based chained lookups per comparison
+                    first_pf_time = parent_fraction["time"].iloc[0]
                     if (
-                        parent_fraction["time"][0]
-                        == wp["whole_blood_activity"]["time"][0]
-                        and parent_fraction["time"][0] == 0
+                        first_pf_time == wp["whole_blood_activity"]["time"].iloc[0]
+                        and first_pf_time == 0
                     ):
-                        if self.multiply_plasma:
-                            wp["plasma_activity"].loc[-1] = [0, 1]
-                        else:
-                            wp["plasma_activity"].loc[-1] = [0, 0]
-
-                        wp["plasma_activity"].index = wp["plasma_activity"].index + 1
+                        # prepend the time-zero row with a single concat instead of
+                        # writing to a phantom -1 label and renumbering the index
+                        zero_row = pandas.DataFrame(
+                            [[0, 1 if self.multiply_plasma else 0]],
+                            columns=wp["plasma_activity"].columns,
+                        )
                         wp["plasma_activity"] = (
-                            wp["plasma_activity"]
+                            pandas.concat(
+                                [zero_row, wp["plasma_activity"]], ignore_index=True
+                            )
                             .sort_values("time")
                             .reset_index(drop=True)
                         )
@@ -520,11 +738,7 @@ class PmodToBlood:
                             f"time points to extract in whole blood."
                         )
 
-                for activity_series in duplicates.keys():
-                    for pf_time in parent_fraction.get("time", []):
-                        for df_time in wp.get(key).get("time", []):
-                            if numpy.isclose(pf_time, df_time, atol=self.atol):
-                                duplicates[activity_series].append(df_time)
+                self.find_duplicate_times(parent_fraction, wp, duplicates)
 
             # end else w/ no duplicates
             else:
@@ -545,26 +759,19 @@ class PmodToBlood:
 
                 # we only want to remove rows if they exist in autosampled data, but are clearly manually sampled
                 if self.data_collection.get(activity_series) == "automatic":
-                    removed_rows = pandas.DataFrame(
-                        columns=self.blood_series.get(
-                            activity_series, pandas.DataFrame()
-                        ).columns
-                    )
-
-                    for time in duplicate_times:
-                        index = helper_functions.get_coordinates_containing(
-                            time, self.blood_series[activity_series], exact=False
-                        )
-
-                        if index:
-                            row = index[0][0]
-
-                            dropped_row = helper_functions.drop_row(
-                                self.blood_series[activity_series], row
-                            )
-
-                            # using the loc indexer, append the series to the end of the df
-                            removed_rows.loc[len(removed_rows)] = dropped_row
+                    series = self.blood_series[activity_series]
+                    # the duplicate scan already produced the row mask for this
+                    # series; reuse it rather than re-matching the times, falling
+                    # back to an isclose broadcast if the frame has changed shape
+                    duplicate_mask = self.duplicate_masks.get(activity_series)
+                    if duplicate_mask is None or len(duplicate_mask) != len(series):
+                        duplicate_mask = numpy.isclose(
+                            series["time"].to_numpy()[:, numpy.newaxis],
+                            duplicate_times,
+                            rtol=0.001,
+                        ).any(axis=1)
+                    removed_rows = series[duplicate_mask]
+                    self.blood_series[activity_series] = series[~duplicate_mask]
 
                 # update the blood series object with the popped/dropped row
                 new_string = f"{activity_series}_manually_popped"
@@ -575,18 +782,21 @@ class PmodToBlood:
                 self.data_collection[new_string] = "manual"
 
                 if len(self.blood_series[new_string]) == (len(parent_fraction) - 1):
+                    first_pf_time = self.blood_series["parent_fraction"]["time"].iloc[0]
                     if (
-                        self.blood_series["parent_fraction"]["time"][0]
-                        != self.blood_series[new_string]["time"][0]
-                        and parent_fraction["time"][0] == 0
+                        first_pf_time != self.blood_series[new_string]["time"].iloc[0]
+                        and first_pf_time == 0
                     ):
 
-                        self.blood_series[new_string].loc[-1] = [0, 0]
-                        self.blood_series[new_string].index = (
-                            self.blood_series[new_string].index + 1
+                        # same single-concat prepend as the plasma branch above
+                        zero_row = pandas.DataFrame(
+                            [[0, 0]], columns=self.blood_series[new_string].columns
                         )
                         self.blood_series[new_string] = (
-                            self.blood_series[new_string]
+                            pandas.concat(
+                                [zero_row, self.blood_series[new_string]],
+                                ignore_index=True,
+                            )
                             .sort_values("time")
                             .reset_index(drop=True)
                         )
@@ -599,38 +809,49 @@ class PmodToBlood:
 
         # if provided with the plasma ratio we multiply the whole blood by it, math time
         if self.multiply_plasma:
-            # get our plasma activity, we get the manually popped if it exists
-            pa = self.blood_series.get(
-                "plasma_activity_manually_popped", self.blood_series["plasma_activity"]
+            plasma_activity = self.blood_series["plasma_activity"]
+
+            wba = self.blood_series.get("whole_blood_activity_manually_popped")
+            if wba is None or wba.shape[0] == 0:
+                wba = self.blood_series["whole_blood_activity"]
+
+            # one fused numpy multiply writes the scaled plasma values back into the
+            # existing frame instead of building a replacement dataframe; operating
+            # on the raw arrays also keeps the time column out of the product
+            plasma_activity["plasma_radioactivity"] = (
+                wba["whole_blood_radioactivity"].to_numpy()
+                * plasma_activity["plasma_radioactivity"].to_numpy()
             )
 
-            if (
-                self.blood_series.get(
-                    "whole_blood_activity_manually_popped", pandas.DataFrame()
-                ).shape[0]
-                != 0
-            ):
-
-                wba = self.blood_series["whole_blood_activity_manually_popped"]
-                new_plasma = (
-                    wba["whole_blood_radioactivity"]
-                    * self.blood_series["plasma_activity"]["plasma_radioactivity"]
-                )
-
-                temp = pandas.DataFrame(
-                    {
-                        "time": self.blood_series["plasma_activity"]["time"],
-                        "plasma_radioactivity": new_plasma,
-                    }
-                )
-
-                self.blood_series["plasma_activity"] = temp
-
-            else:
-                self.blood_series["plasma_activity"] = (
-                    self.blood_series["plasma_activity"]
-                    * self.blood_series["whole_blood"]
-                )
+    def find_duplicate_times(self, parent_fraction, wp, duplicates):
+        """
+        Marks activity time points that also appear in the parent fraction file by
+        binary-searching the sorted parent fraction times for each activity time and
+        checking the nearest neighbor on either side for closeness, rather than
+        comparing every pair of times.
+
+        :param parent_fraction: parent fraction dataframe with a 'time' column
+        :type parent_fraction: pandas.DataFrame
+        :param wp: mapping of activity series names to their dataframes
+        :type wp: dict
+        :param duplicates: mapping of activity series names to lists that duplicated
+            time points are appended to, modified in place
+        :type duplicates: dict
+        :return: None
+        :rtype: None
+        """
+        pf_times = numpy.sort(parent_fraction["time"].to_numpy())
+        last_pf = len(pf_times) - 1
+        for activity_series in duplicates.keys():
+            activity_times = wp[activity_series]["time"].to_numpy()
+            insert_points = numpy.searchsorted(pf_times, activity_times)
+            below = pf_times[numpy.clip(insert_points - 1, 0, last_pf)]
+            above = pf_times[numpy.clip(insert_points, 0, last_pf)]
+            close_to_pf = numpy.isclose(
+                below, activity_times, atol=self.atol
+            ) | numpy.isclose(above, activity_times, atol=self.atol)
+            duplicates[activity_series].extend(activity_times[close_to_pf].tolist())
+            self.duplicate_masks[activity_series] = close_to_pf
 
     def scale_time_rename_columns(self):
         """
@@ -639,45 +860,64 @@ class PmodToBlood:
         """
         # scale time info to seconds if it's minutes
         for name, dataframe in self.blood_series.items():
-            time_column_header_name = []
-            radioactivity_column_header_name = []
-            parent_fraction_column_header_name = []
             time_scalar = 1.0
-            time_column_header_name = [
-                header
-                for header in list(dataframe.columns)
-                if "sec" in str.lower(header)
-            ]
-            if not time_column_header_name:
-                time_column_header_name = [
-                    header
-                    for header in list(dataframe.columns)
-                    if "min" in str.lower(header)
-                ]
+            # classify every header in a single pass, lowering each one exactly once;
+            # the branches below consume these buckets instead of re-scanning columns
+            lowered_headers = {}
+            seconds_column_header_name = []
+            minutes_column_header_name = []
+            parent_fraction_column_header_name = []
+            radioactivity_candidate_header_name = []
+            for header in dataframe.columns:
+                lowered = str.lower(str(header))
+                lowered_headers[header] = lowered
+                if "sec" in lowered:
+                    seconds_column_header_name.append(header)
+                elif "min" in lowered:
+                    minutes_column_header_name.append(header)
+                if "parent" in lowered:
+                    parent_fraction_column_header_name.append(header)
+                # the old comprehension tested `"bq" and "cc" in lowered`, which
+                # python reads as just `"cc" in lowered`; require the bq prefix
+                # and accept the documented ml spelling too
+                if "bq" in lowered and ("cc" in lowered or "ml" in lowered):
+                    radioactivity_candidate_header_name.append(header)
+
+            if seconds_column_header_name:
+                time_column_header_name = seconds_column_header_name
+            else:
+                time_column_header_name = minutes_column_header_name
                 if time_column_header_name:
                     time_scalar = 60.0
 
             if time_column_header_name and len(time_column_header_name) == 1:
-                dataframe.rename(
-                    columns={time_column_header_name[0]: "time"}, inplace=True
-                )
+                # renames are collected here and applied in one shot at the bottom
+                # of the loop
+                column_renames = {time_column_header_name[0]: "time"}
             else:
                 raise Exception(
                     "Unable to locate time column in blood file, make sure input files are formatted "
                     "to include a single time column in minutes or seconds."
                 )
 
-            # scale the time column to seconds
-            dataframe["time"] = dataframe["time"] * time_scalar
-            self.blood_series[name] = dataframe
+            # scale the time column to seconds; input already in seconds needs no
+            # multiply at all, and float columns are scaled in place rather than
+            # allocating a replacement series
+            if time_scalar != 1.0:
+                time_values = dataframe[time_column_header_name[0]].to_numpy()
+                # copy-on-write pandas hands back read-only views, in which case
+                # (or for integer columns that must widen) assign a scaled copy
+                if (
+                    numpy.issubdtype(time_values.dtype, numpy.floating)
+                    and time_values.flags.writeable
+                ):
+                    numpy.multiply(time_values, time_scalar, out=time_values)
+                else:
+                    dataframe[time_column_header_name[0]] = time_values * time_scalar
 
-            # locate parent fraction column
-            parent_fraction_column_header_name = [
-                header for header in dataframe.columns if "parent" in str.lower(header)
-            ]
             parent_fraction_is_suspicous = False
             if len(parent_fraction_column_header_name) >= 1:
-                pf = str(parent_fraction_column_header_name[0]).lower()
+                pf = lowered_headers[parent_fraction_column_header_name[0]]
                 if "bq" in pf or "ml" in pf:
                     logging.warning(
                         f"Found {parent_fraction_column_header_name[0]} in {name} input file, this column "
@@ -685,38 +925,41 @@ class PmodToBlood:
                     )
                     parent_fraction_is_suspicous = True
 
+            radioactivity_column_header_name = []
             if not parent_fraction_column_header_name or parent_fraction_is_suspicous:
                 # locate radioactivity column
-                radioactivity_column_header_name = [
-                    header
-                    for header in dataframe.columns
-                    if "bq" and "cc" in str.lower(header)
-                ]
+                radioactivity_column_header_name = radioactivity_candidate_header_name
                 # run through radio updating conversion if not percent parent
             if radioactivity_column_header_name and len(time_column_header_name) == 1:
-                sub_ml_for_cc = re.sub("cc", "mL", radioactivity_column_header_name[0])
-                extracted_units = re.search(r"\[(.*?)\]", sub_ml_for_cc)
+                extracted_units = bracketed_units_pattern.search(
+                    radioactivity_column_header_name[0]
+                )
                 second_column_name = None
-                if "plasma" in str.lower(radioactivity_column_header_name[0]) or (
-                    "bq/cc" in str.lower(radioactivity_column_header_name[0])
+                lowered_radioactivity_header = lowered_headers[
+                    radioactivity_column_header_name[0]
+                ]
+                if "plasma" in lowered_radioactivity_header or (
+                    "bq/cc" in lowered_radioactivity_header
                     and name == "plasma_activity"
                 ):
                     second_column_name = "plasma_radioactivity"
 
                 if name == "whole_blood_activity":
-                    if "whole" in str.lower(
-                        radioactivity_column_header_name[0]
-                    ) or "blood" in str.lower(radioactivity_column_header_name[0]):
+                    if (
+                        "whole" in lowered_radioactivity_header
+                        or "blood" in lowered_radioactivity_header
+                    ):
                         second_column_name = "whole_blood_radioactivity"
 
                 if second_column_name:
-                    dataframe = dataframe.rename(
-                        {radioactivity_column_header_name[0]: second_column_name},
-                        axis="columns",
+                    column_renames[radioactivity_column_header_name[0]] = (
+                        second_column_name
                     )
 
                 if extracted_units:
-                    self.units = extracted_units.group(1)
+                    # swap cc for mL inside the short captured unit text rather
+                    # than re-scanning the whole header with a second regex pass
+                    self.units = extracted_units.group(1).replace("cc", "mL")
                 else:
                     raise Exception(
                         "Unable to determine radioactivity entries from .bld column name. Column name/units must be in "
@@ -728,15 +971,15 @@ class PmodToBlood:
                 and len(parent_fraction_column_header_name) == 1
                 and name != "plasma_activity"
             ):
-                dataframe = dataframe.rename(
-                    {
-                        parent_fraction_column_header_name[
-                            0
-                        ]: "metabolite_parent_fraction"
-                    },
-                    axis="columns",
+                column_renames[parent_fraction_column_header_name[0]] = (
+                    "metabolite_parent_fraction"
                 )
-            self.blood_series[name] = dataframe.copy(deep=True)
+
+            # apply every accumulated rename with a single in-place columns
+            # reassignment rather than a DataFrame.rename copy per column
+            dataframe.columns = [
+                column_renames.get(column, column) for column in dataframe.columns
+            ]
 
     def ask_recording_type(self, recording: str):
         """
@@ -748,29 +991,38 @@ class PmodToBlood:
         :return: None
         :rtype: None
         """
-        how = None
-        while how != "a" or how != "m":
-            how = input(
-                f"How was the {recording} data sampled?:\nEnter A for automatically or M for manually\n"
-            )
-            if str.lower(how) == "m":
-                self.data_collection[recording] = "manual"
-                break
-            elif str.lower(how) == "a":
-                self.data_collection[recording] = "automatic"
-                break
-            elif str.lower(how) == "y":
-                self.data_collection[recording] = "manual"
+        # 'y' is treated as manual on the assumption the cli was driven w/ '-y' on
+        # bash/zsh etc
+        answers = {"m": "manual", "a": "automatic", "y": "manual"}
+        collection_method = None
+        while collection_method is None:
+            try:
+                how = str.lower(
+                    input(
+                        f"How was the {recording} data sampled?:\nEnter A for automatically or M for manually\n"
+                    )
+                )
+            except EOFError:
+                # stdin is closed (e.g. an unattended batch run); fall back to
+                # manual rather than spinning on the prompt forever
+                how = "m"
                 warnings.warn(
-                    f"Received {how} as input, assuming input received from cli w/ '-y' option on bash/zsh etc, "
-                    f"defaulting to manual input"
+                    f"Reached end of input while asking how {recording} was sampled, defaulting to "
+                    f"manual. Pass {recording}_collection_method as a kwarg to run non-interactively."
                 )
-                break
-            else:
+            collection_method = answers.get(how)
+            if collection_method is None:
                 print(
                     f"You entered {how}; please enter either M or A to exit this prompt"
                 )
 
+        if how == "y":
+            warnings.warn(
+                f"Received {how} as input, assuming input received from cli w/ '-y' option on bash/zsh etc, "
+                f"defaulting to manual input"
+            )
+        self.data_collection[recording] = collection_method
+
     def write_out_tsvs(self):
         """
         Writes out blood data to tsv files corresponding to autosampled or manually sampled versions (dependent on user
@@ -781,41 +1033,111 @@ class PmodToBlood:
         """
         # first we combine the various blood data into one or two dataframes, the autosampled data goes into a
         # recording_autosample, and the manually sampled data goes into a recording_manual if they exist
-        if self.subject_id:
-            file_path = join(self.output_path, self.subject_id + "_")
-            if self.session_id:
-                file_path += self.session_id + "_"
-            manual_path = file_path + "recording-manual_blood.tsv"
-            automatic_path = file_path + "recording-automatic_blood.tsv"
-        else:
-            manual_path = join(self.output_path, "recording-manual_blood.tsv")
-            automatic_path = join(self.output_path, "recording-automatic_blood.tsv")
+        manual_path = self.file_path_prefix + "recording-manual_blood.tsv"
+        automatic_path = self.file_path_prefix + "recording-automatic_blood.tsv"
 
         # first combine autosampled data
         if self.auto_sampled:
-            first_auto_sampled = self.blood_series[self.auto_sampled.pop()["name"]]
-            for remaining_auto in self.auto_sampled:
-                remaining_auto = self.blood_series[remaining_auto["name"]]
-                column_difference = remaining_auto.columns.difference(
-                    first_auto_sampled.columns
-                )
-                for column in list(column_difference):
-                    first_auto_sampled[column] = remaining_auto[column]
-            first_auto_sampled.to_csv(automatic_path, sep="\t", index=False)
+            auto_sampled = self.combine_sampled_frames(self.auto_sampled)
+            self.write_tsv(auto_sampled, automatic_path, gzip_output=self.gzip_output)
 
         # combine any additional manually sampled dataframes
         if self.manually_sampled:
-            first_manually_sampled = self.blood_series[
-                self.manually_sampled.pop()["name"]
-            ]
-            for remaining_manual in self.manually_sampled:
-                remaining_manual = self.blood_series[remaining_manual["name"]]
-                column_difference = remaining_manual.columns.difference(
-                    first_manually_sampled.columns
+            manually_sampled = self.combine_sampled_frames(self.manually_sampled)
+            self.write_tsv(manually_sampled, manual_path, gzip_output=self.gzip_output)
+
+    @staticmethod
+    def write_tsv(dataframe, file_path, gzip_output=False):
+        """
+        Writes a dataframe out to a tab separated file. Blood frames are almost always purely numeric, in which
+        case the values are formatted in bulk with numpy.savetxt instead of going through the per-cell generic
+        writer inside DataFrame.to_csv; frames with non-numeric columns are transposed to row tuples once and
+        handed to csv.writerows.
+
+        :param dataframe: blood data to write out
+        :type dataframe: pandas.DataFrame
+        :param file_path: destination path of the tsv file
+        :type file_path: str
+        :param gzip_output: compress the output on the fly, appending .gz to the file path
+        :type gzip_output: bool
+        :return: None
+        :rtype: None
+        """
+        import_data_libraries()
+        # a 1 MiB buffer lets both writers hand the kernel a few large writes
+        # instead of one syscall per formatted row; when gzipping, level 1 keeps
+        # the compression cheap while still shrinking the bytes that hit disk
+        if gzip_output:
+            tsv_file = gzip.open(
+                str(file_path) + ".gz", "wt", compresslevel=1, newline=""
+            )
+        else:
+            tsv_file = open(file_path, "w", buffering=1 << 20, newline="")
+        with tsv_file:
+            if all(
+                pandas.api.types.is_numeric_dtype(dtype) for dtype in dataframe.dtypes
+            ):
+                values = dataframe.to_numpy()
+                nan_mask = dataframe.isna().to_numpy()
+                row_format = "%.12g"
+                if nan_mask.any():
+                    # %.12g would print NaN as the literal string "nan"; BIDS
+                    # spells missing values "n/a", so pre-format the cells and
+                    # substitute before handing the rows to savetxt
+                    values = numpy.where(
+                        nan_mask, "n/a", numpy.char.mod("%.12g", values)
+                    )
+                    row_format = "%s"
+                numpy.savetxt(
+                    tsv_file,
+                    values,
+                    fmt=row_format,
+                    delimiter="\t",
+                    header="\t".join(str(column) for column in dataframe.columns),
+                    comments="",
                 )
-                for column in list(column_difference):
-                    first_manually_sampled[column] = remaining_manual[column]
-            first_manually_sampled.to_csv(manual_path, sep="\t", index=False)
+            else:
+                columns = [
+                    [
+                        "n/a" if pandas.isna(value) else value
+                        for value in dataframe[column].tolist()
+                    ]
+                    for column in dataframe.columns
+                ]
+                # the default excel dialect terminates rows with \r\n; match the
+                # plain \n the numeric path and DataFrame.to_csv write
+                writer = csv.writer(tsv_file, delimiter="\t", lineterminator="\n")
+                writer.writerow(dataframe.columns)
+                writer.writerows(zip(*columns))
+
+    def combine_sampled_frames(self, sampled):
+        """
+        Combines the dataframes collected for a sampling method (manual or automatic) into a single dataframe,
+        keeping only the columns that haven't appeared in an earlier frame. The new columns are gathered up and
+        joined onto the first frame in one pass instead of being inserted into it one at a time.
+
+        :param sampled: list of {'name': measure} entries pointing at dataframes in self.blood_series
+        :type sampled: list
+        :return: single combined dataframe
+        :rtype: pandas.DataFrame
+        """
+        frames = [self.blood_series[entry["name"]] for entry in sampled]
+        pieces = [frames.pop()]
+        # a plain set sidesteps the sorted Index that columns.difference builds on every pass
+        seen_columns = set(pieces[0].columns)
+        for frame in frames:
+            column_difference = [
+                column for column in frame.columns if column not in seen_columns
+            ]
+            if column_difference:
+                pieces.append(frame[column_difference])
+                seen_columns.update(column_difference)
+        if len(pieces) > 1:
+            # join left-aligns the added column blocks to the first frame's index
+            # the way the old per-column assignments did; concat would take the
+            # union of the row labels and pad the extras with NaN
+            return pieces[0].join(pieces[1:])
+        return pieces[0]
 
     def write_out_jsons(self):
         """
@@ -824,95 +1146,82 @@ class PmodToBlood:
         :return: None
         :rtype: None
         """
-        if self.subject_id:
-            file_path = join(self.output_path, self.subject_id + "_")
-            if self.session_id:
-                file_path += self.session_id + "_"
-            file_path += "blood.json"
-        else:
-            file_path = join(self.output_path, "blood.json")
+        file_path = self.file_path_prefix + "blood.json"
 
+        # shallow-copy the invariant module level template and drop in this run's units
         side_car_template = {
-            "Time": {
-                "Description": "Time in relation to time zero defined by the _pet.json",
-                "Units": "s",
-            },
-            "whole_blood_radioactivity": {
-                "Description": "Radioactivity in whole blood samples.",
-                "Units": self.units,
-            },
-            "metabolite_parent_fraction": {
-                "Description": "Parent fraction of the radiotracer",
-                "Units": "arbitrary",
-            },
+            key: dict(value) for key, value in blood_sidecar_template.items()
         }
+        side_car_template["whole_blood_radioactivity"]["Units"] = self.units
 
-        if self.kwargs.get("MetaboliteMethod", None):
-            side_car_template["MetaboliteMethod"] = (
-                self.kwargs.get("MetaboliteMethod"),
-            )
-        elif self.kwargs.get("MetaboliteRecoveryCorrectionApplied", None):
-            side_car_template["MetaboliteRecoveryCorrectionApplied"] = self.kwargs.get(
-                "MetaboliteRecoveryCorrectionApplied"
-            )
-        elif self.kwargs.get("DispersionCorrected", None):
-            side_car_template["DispersionCorrected"] = self.kwargs.get(
-                "DispersionCorrected"
-            )
+        # look each of these up once rather than re-hashing the kwargs dict in every branch below
+        metabolite_method = self.kwargs.get("MetaboliteMethod", None)
+        metabolite_recovery_correction = self.kwargs.get(
+            "MetaboliteRecoveryCorrectionApplied", None
+        )
+        dispersion_corrected = self.kwargs.get("DispersionCorrected", None)
 
         side_car_template["MetaboliteAvail"] = True
 
-        if self.kwargs.get("MetaboliteMethod", None):
-            side_car_template["MetaboliteMethod"] = self.kwargs.get("MetaboliteMethod")
+        if metabolite_method:
+            side_car_template["MetaboliteMethod"] = metabolite_method
         else:
             warnings.warn(
                 "Parent fraction is available, but MetaboliteMethod is not specified, which is not BIDS "
                 "compliant."
             )
 
-        if self.kwargs.get("DispersionCorrected"):
-            side_car_template["DispersionCorrected"] = self.kwargs.get(
-                "DispersionCorrected"
+        if metabolite_recovery_correction:
+            side_car_template["MetaboliteRecoveryCorrectionApplied"] = (
+                metabolite_recovery_correction
             )
+
+        if dispersion_corrected:
+            side_car_template["DispersionCorrected"] = dispersion_corrected
         else:
             warnings.warn(
                 "Parent fraction is available, but there is no information if DispersionCorrected was"
                 + "applied, which is not BIDS compliant"
             )
 
-        if self.blood_series.get("plasma_activity", None) is type(pd.DataFrame):
+        if isinstance(self.blood_series.get("plasma_activity", None), pandas.DataFrame):
             side_car_template["PlasmaAvail"] = True
             side_car_template["plasma_radioactivity"] = {
                 "Description": "Radioactivity in plasma samples",
                 "Units": self.units,
             }
 
-        with open(file_path, "w") as out_json:
-            json.dump(side_car_template, out_json, indent=4)
+        # serialize and encode the whole sidecar up front so the file sees one
+        # binary write instead of many small chunks through the text wrapper
+        encoded = json.dumps(side_car_template, indent=4).encode("utf-8")
+        with open(file_path, "wb") as out_json:
+            out_json.write(encoded)
 
     def check_for_interpolated_data(self):
         # check to see if there may exist (emphasis on may) interpolated plasma values
-        if type(self.blood_series.get("plasma_activity", None)) is not None:
-            # extract parent fraction/metabolite fraction as series from dataframes
+        if isinstance(self.blood_series.get("plasma_activity", None), pandas.DataFrame):
+            # extract parent fraction/metabolite fraction and plasma activity as series from the dataframes in a
+            # single pass, lowercasing each column name once and stopping as soon as both series are found
             metabolite_parent_fraction_series = pandas.Series(dtype="float64")
-            for name, dataframe in self.blood_series.items():
-                columns = dataframe.columns
-                for entry in columns:
-                    if "parent" in str.lower(entry) or "fraction" in str.lower(entry):
-                        metabolite_parent_fraction_series = dataframe[str(entry)]
-                        break
-                if len(metabolite_parent_fraction_series) > 0:
-                    break
-
-            # check dataframes for plasma activity
             plasma_activity_series = pandas.Series(dtype="float64")
             for name, dataframe in self.blood_series.items():
-                columns = dataframe.columns
-                for entry in columns:
-                    if "plasma_radioactivity" in entry:
-                        plasma_activity_series = dataframe[str(entry)]
-                        break
-                if len(plasma_activity_series) > 0:
+                # lowercase the whole column index in one vectorized call rather than per entry
+                for entry, lowered_entry in zip(
+                    dataframe.columns, dataframe.columns.str.lower()
+                ):
+                    if len(metabolite_parent_fraction_series) == 0 and (
+                        "parent" in lowered_entry or "fraction" in lowered_entry
+                    ):
+                        metabolite_parent_fraction_series = dataframe[entry]
+                    elif (
+                        len(plasma_activity_series) == 0
+                        and "plasma_radioactivity" in entry
+                    ):
+                        plasma_activity_series = dataframe[entry]
+                if (
+                    len(metabolite_parent_fraction_series) > 0
+                    and len(plasma_activity_series) > 0
+                ):
                     break
 
             if (
@@ -929,20 +1238,25 @@ class PmodToBlood:
                     )
 
     def check_fraction_is_fraction(self):
-        # collect parent fractions wherever they may exist
-        fraction_series = []
-        for name, dataframe in self.blood_series.items():
-            for column in dataframe.columns:
-                if "fraction" in str(column).lower():
-                    fraction_series.append({name: dataframe[column]})
+        # collect parent fractions wherever they may exist; the scan lowercases every
+        # column name, so hold onto its result for any repeat calls
+        if self.fraction_series is None:
+            self.fraction_series = [
+                (name, dataframe[column])
+                for name, dataframe in self.blood_series.items()
+                for column in dataframe.columns
+                if "fraction" in str(column).lower()
+            ]
 
-        for fraction_column in fraction_series:
-            for name, values in fraction_column.items():
-                for value in values:
-                    logging.warning(
-                        f"No, no my friend parent/metabolite fraction must be less than or equal to 1,"
-                        f" found {value} in {name}."
-                    )
+        for name, values in self.fraction_series:
+            # compare the whole column at once and emit a single warning per
+            # column instead of formatting one per offending cell
+            offenders = values[values > 1]
+            if len(offenders) > 0:
+                logging.warning(
+                    f"No, no my friend parent/metabolite fraction must be less than or equal to 1,"
+                    f" found {len(offenders)} such value(s) in {name}: {offenders.tolist()}."
+                )
 
 
 def main():
@@ -957,12 +1271,23 @@ def main():
     if cli_args.show_examples:
         print(example1)
     elif cli_args.whole_blood_path and cli_args.parent_fraction_path:
+        # fold the collection-method flags into kwargs so PmodToBlood skips the
+        # interactive prompts; explicit kwargs entries win over the flags
+        collection_methods = {
+            "whole_blood_activity_collection_method": cli_args.whole_blood_activity_collection_method,
+            "parent_fraction_collection_method": cli_args.parent_fraction_collection_method,
+            "plasma_activity_collection_method": cli_args.plasma_activity_collection_method,
+        }
+        for method_key, method in collection_methods.items():
+            if method and not cli_args.kwargs.get(method_key):
+                cli_args.kwargs[method_key] = method
         pmod_to_blood = PmodToBlood(
             whole_blood_activity=cli_args.whole_blood_path,
             parent_fraction=cli_args.parent_fraction_path,
             plasma_activity=cli_args.plasma_activity_path,
             output_path=cli_args.output_path,
             output_json=cli_args.json,
+            gzip_output=cli_args.gzip,
             engine=cli_args.engine,
             kwargs=cli_args.kwargs,
         )
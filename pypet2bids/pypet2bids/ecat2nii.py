@@ -36,6 +36,37 @@ if ecat_save_steps == "1":
 
 logger = logging.getLogger("pypet2bids")
 
+# cache variable
+# when set to 1 a parsed copy of each ECAT is pickled next to it and reused on
+# rerun instead of re-parsing the ECAT byte by byte
+ecat_cache = os.environ.get("PET2BIDS_CACHE_ECAT", 0)
+
+
+def _read_ecat_cached(ecat_file):
+    """
+    Reads an ECAT file via :func:`pypet2bids.read_ecat.read_ecat`, caching the parsed
+    headers and pixel data in a pickle sidecar when PET2BIDS_CACHE_ECAT is set to 1.
+    A sidecar older than its ECAT file is considered stale and regenerated.
+
+    :param ecat_file: path to an ecat file
+    :return: main_header, a list of subheaders for each frame, and the pixel data
+    """
+    if ecat_cache != "1":
+        return read_ecat(ecat_file=ecat_file)
+
+    cache_file = pathlib.Path(str(ecat_file) + ".cache.pickle")
+    if (
+        cache_file.is_file()
+        and cache_file.stat().st_mtime >= pathlib.Path(ecat_file).stat().st_mtime
+    ):
+        with open(cache_file, "rb") as cached:
+            return pickle.load(cached)
+
+    main_header, sub_headers, data = read_ecat(ecat_file=ecat_file)
+    with open(cache_file, "wb") as cached:
+        pickle.dump((main_header, sub_headers, data), cached, protocol=5)
+    return main_header, sub_headers, data
+
 
 def ecat2nii(
     ecat_main_header=None,
@@ -69,8 +100,6 @@ def ecat2nii(
     # if a nifti file/path is not included write a nifti next to the ecat file
     if not nifti_file:
         nifti_file = os.path.splitext(ecat_file)[0] + ".nii"
-    else:
-        nifti_file = nifti_file
 
     if not pathlib.Path(nifti_file).parent.exists():
         pathlib.Path(nifti_file).parent.mkdir(parents=True, exist_ok=True)
@@ -87,7 +116,7 @@ def ecat2nii(
         and ecat_file
     ):
         # collect ecat_file
-        main_header, sub_headers, data = read_ecat(ecat_file=ecat_file)
+        main_header, sub_headers, data = _read_ecat_cached(ecat_file)
     elif (
         ecat_file is None
         and type(ecat_main_header) is dict
@@ -164,56 +193,63 @@ def ecat2nii(
             f"and shape of imaging data ({img_shape}"
         )
 
-    # format data into acceptable shape for nibabel, by first creating empty matrix
-    img_temp = numpy.zeros(
+    # format data into acceptable shape for nibabel, by first creating empty matrix;
+    # every element is overwritten by the scale broadcast below so the buffer doesn't
+    # need zeroing, and it's kept in native byte order so arithmetic on it doesn't
+    # force a byteswap on little-endian hosts, nibabel writes out whatever order it's
+    # handed
+    img_temp = numpy.empty(
         shape=(
             sub_headers[0]["X_DIMENSION"],
             sub_headers[0]["Y_DIMENSION"],
             sub_headers[0]["Z_DIMENSION"],
             main_header["NUM_FRAMES"],
         ),
-        dtype=">f4",
+        dtype=numpy.float32,
     )
 
-    # collect timing information
-    start, delta = [], []
-
-    # collect prompts and randoms
-    prompts, randoms = [], []
-
-    # load frame data into img temp
-    for index in reversed(
-        range(img_shape[3])
-    ):  # Don't throw stones working from existing matlab code
-        print(f"Loading frame {index + 1}")
-        img_temp[:, :, :, index] = numpy.flip(
-            numpy.flip(
-                numpy.flip(
-                    data[:, :, :, index] * sub_headers[index]["SCALE_FACTOR"], 1
-                ),
-                2,
-            ),
-            0,
-        )
-        start.append(sub_headers[index]["FRAME_START_TIME"] * 60)  # scale to per minute
-        delta.append(sub_headers[index]["FRAME_DURATION"] * 60)  # scale to per minute
-
-        if main_header.get("SW_VERSION", 0) >= 73:
-            # scale both to per minute
-            prompts.append(
-                sub_headers[index]["PROMPT_RATE"]
-                * sub_headers[index]["FRAME_DURATION"]
-                * 60
-            )
-            randoms.append(
-                sub_headers[index]["RANDOM_RATE"]
-                * sub_headers[index]["FRAME_DURATION"]
-                * 60
-            )
-        else:
-            # this field is not available in ecat 7.2
-            prompts.append(0)
-            randoms.append(0)
+    # load frame data into img temp with a single broadcast multiply over the whole
+    # 4D array instead of iterating frames in python; the x/y/z reversal is done with
+    # negative-stride slicing, a free view, and the per-frame scale factors broadcast
+    # along the frame axis
+    # single precision scale factors keep the whole multiply in float32, double
+    # precision would double the arithmetic width only to be cast away on store
+    scale_factors = numpy.array(
+        [sub_header["SCALE_FACTOR"] for sub_header in sub_headers],
+        dtype=numpy.float32,
+    )
+    # write straight into img_temp so the broadcast never materializes a second
+    # cube-sized temporary on top of the input data; with the C-ordered (x, y, z,
+    # frame) layout the frame axis is already the fastest-varying one, so the scale
+    # vector stays resident in the innermost loop of the broadcast
+    numpy.multiply(data[::-1, ::-1, ::-1, :], scale_factors, out=img_temp)
+
+    # collect timing, prompt, and random information per frame in single passes over
+    # the subheaders; frames are walked last-to-first to match the ordering the
+    # original frame loop (and the matlab code) used, don't throw stones
+    frame_headers = [sub_headers[index] for index in reversed(range(img_shape[3]))]
+    start = [
+        frame_header["FRAME_START_TIME"] * 60 for frame_header in frame_headers
+    ]  # scale to per minute
+    delta = [
+        frame_header["FRAME_DURATION"] * 60 for frame_header in frame_headers
+    ]  # scale to per minute
+
+    sw_version = main_header.get("SW_VERSION", 0)
+    if sw_version >= 73:
+        # scale both to per minute
+        prompts = [
+            frame_header["PROMPT_RATE"] * frame_header["FRAME_DURATION"] * 60
+            for frame_header in frame_headers
+        ]
+        randoms = [
+            frame_header["RANDOM_RATE"] * frame_header["FRAME_DURATION"] * 60
+            for frame_header in frame_headers
+        ]
+    else:
+        # this field is not available in ecat 7.2
+        prompts = [0] * len(frame_headers)
+        randoms = [0] * len(frame_headers)
 
     # debug step #7 view data after flipping into nifti space/orientation
     if ecat_save_steps == "1":
@@ -225,15 +261,24 @@ def ecat2nii(
 
     # so the only real difference between the matlab code and the python code is that that we aren't manually
     # scaling the date to 16 bit integers.
-    rg = img_temp.max() - img_temp.min()
+    # scan the cube for its extrema once and track them through the rescale
+    # arithmetic below, rather than re-walking the full array at every step
+    max_img = float(img_temp.max())
+    min_img = float(img_temp.min())
+    rg = max_img - min_img
+    sca = 1.0
     if rg != 32767:
-        max_img = img_temp.max()
-        img_temp = img_temp / max_img * 32767
+        # rescale in place rather than binding a fresh full-size array per divide
+        img_temp /= max_img
+        img_temp *= 32767
         sca = max_img / 32767
-        min_img = img_temp.min()
+        max_img = 32767.0
+        min_img = min_img / sca
         if min_img < -32768:
-            img_temp = img_temp / (min_img * -32768)
+            img_temp /= min_img * -32768
             sca = sca * (min_img * -32768)
+            max_img = max_img / (min_img * -32768)
+            min_img = min_img / (min_img * -32768)
     if ecat_save_steps == "1":
         with open(os.path.join(steps_dir, "8.5_sca.txt"), "w") as sca_file:
             sca_file.write(f"Scaling factor: {sca}\n")
@@ -241,8 +286,8 @@ def ecat2nii(
                 f"Scaling factor * ECAT Cal Factor: {sca * main_header['ECAT_CALIBRATION_FACTOR']}\n"
             )
 
-    # scale image to 16 bit
-    final_image = img_temp.astype(numpy.single)
+    # scale image to 16 bit; img_temp is already single precision so no copy is needed
+    final_image = img_temp
 
     # debug step 8 check after "rescaling" to 16 bit
     if ecat_save_steps == "1":
@@ -256,52 +301,48 @@ def ecat2nii(
         "CALIBRATION_UNITS"
     ]  # Header field designating whether data has already been calibrated
     if ecat_cal_units == 1:  # Calibrate if it hasn't been already
-        final_image = (
-            numpy.round(final_image) * main_header["ECAT_CALIBRATION_FACTOR"] * sca
-        )
-        # this debug step may not execute if we're not calibrating the scan, but that's okay
-        if ecat_save_steps == "1":
-            helper_functions.first_middle_last_frames_to_text(
-                four_d_array_like_object=final_image,
-                output_folder=steps_dir,
-                step_name="9_scal_cal_units_ecat2nii_python",
-            )
+        # fold the calibration factor and rescale factor into one scalar, it gets
+        # carried in the nifti scl_slope rather than multiplied through the cube
+        scl_slope = main_header["ECAT_CALIBRATION_FACTOR"] * sca
     else:  # And don't calibrate if CALIBRATION_UNITS is anything else but 1
-        final_image = numpy.round(final_image) * sca
+        scl_slope = sca
 
-    qoffset_x = -1 * (
-        (
-            (sub_headers[0]["X_DIMENSION"] * sub_headers[0]["X_PIXEL_SIZE"] * 10 / 2)
-            - sub_headers[0]["X_PIXEL_SIZE"] * 5
+    # quantize to int16, the same quantization the matlab implementation performs,
+    # storing the physical scaling in scl_slope halves the on-disk/in-memory volume
+    # relative to a float32 quantitative cube; rounding in place avoids a float32
+    # temporary ahead of the int16 cast
+    numpy.round(final_image, out=final_image)
+    final_image = final_image.astype(numpy.int16)
+
+    # this debug step may not execute if we're not calibrating the scan, but that's okay
+    if ecat_cal_units == 1 and ecat_save_steps == "1":
+        helper_functions.first_middle_last_frames_to_text(
+            four_d_array_like_object=final_image * scl_slope,
+            output_folder=steps_dir,
+            step_name="9_scal_cal_units_ecat2nii_python",
         )
+
+    # scale the subheader pixel sizes from cm to mm once, they're reused for each
+    # q-offset and again for the affine
+    x_pixel_size_mm = sub_headers[0]["X_PIXEL_SIZE"] * 10
+    y_pixel_size_mm = sub_headers[0]["Y_PIXEL_SIZE"] * 10
+    z_pixel_size_mm = sub_headers[0]["Z_PIXEL_SIZE"] * 10
+
+    qoffset_x = -1 * (
+        (sub_headers[0]["X_DIMENSION"] * x_pixel_size_mm / 2) - x_pixel_size_mm / 2
     )
 
     qoffset_y = -1 * (
-        (
-            (sub_headers[0]["Y_DIMENSION"] * sub_headers[0]["Y_PIXEL_SIZE"] * 10 / 2)
-            - sub_headers[0]["Y_PIXEL_SIZE"] * 5
-        )
+        (sub_headers[0]["Y_DIMENSION"] * y_pixel_size_mm / 2) - y_pixel_size_mm / 2
     )
 
     qoffset_z = -1 * (
-        (
-            (sub_headers[0]["Z_DIMENSION"] * sub_headers[0]["Z_PIXEL_SIZE"] * 10 / 2)
-            - sub_headers[0]["Z_PIXEL_SIZE"] * 5
-        )
+        (sub_headers[0]["Z_DIMENSION"] * z_pixel_size_mm / 2) - z_pixel_size_mm / 2
     )
 
     # build affine if it's not included in function call
     if not affine:
-        mat = (
-            numpy.diag(
-                [
-                    sub_headers[0]["X_PIXEL_SIZE"],
-                    sub_headers[0]["Y_PIXEL_SIZE"],
-                    sub_headers[0]["Z_PIXEL_SIZE"],
-                ]
-            )
-            * 10
-        )
+        mat = numpy.diag([x_pixel_size_mm, y_pixel_size_mm, z_pixel_size_mm])
         affine = nibabel.affines.from_matvec(mat, [qoffset_x, qoffset_y, qoffset_z])
 
     img_nii = nibabel.Nifti1Image(final_image, affine=affine)
@@ -314,13 +355,14 @@ def ecat2nii(
             step_name="10_save_nii_ecat2nii_python",
         )
 
-    img_nii.header.set_slope_inter(slope=1, inter=0)
+    img_nii.header.set_slope_inter(slope=scl_slope, inter=0)
     img_nii.header.set_xyzt_units("mm", "sec")
     img_nii.header.set_qform(affine, code=1)
     img_nii.header.set_sform(affine, code=1)
-    # No setter methods for these
-    img_nii.header["cal_max"] = final_image.max()
-    img_nii.header["cal_min"] = final_image.min()
+    # No setter methods for these, cal_max/cal_min are in scaled (physical) units and
+    # derived from the extrema tracked during the rescale instead of two more scans
+    img_nii.header["cal_max"] = numpy.round(max_img) * scl_slope
+    img_nii.header["cal_min"] = numpy.round(min_img) * scl_slope
     img_nii.header["descrip"] = "OpenNeuroPET ecat2nii.py conversion"
 
     nibabel.save(img_nii, nifti_file)
@@ -338,7 +380,10 @@ def ecat2nii(
 
     # used for testing veracity of nibabel read and write.
     if save_binary:
-        pickle.dump(img_nii, open(nifti_file + ".pickle", "wb"))
+        with open(nifti_file + ".pickle", "wb") as pickle_file:
+            # protocol 5 serializes the pixel buffer out-of-band instead of copying
+            # it through the pickle stream
+            pickle.dump(img_nii, pickle_file, protocol=5)
 
     # write out timing file
     if sif_out:
@@ -427,8 +427,17 @@ def open_meta_data(
 
     if "xls" in extension or "bld" in extension:
         proper_method = "excel"
+        # files with excel-ish extensions aren't always workbooks, pmod .bld files
+        # in particular are frequently tab separated text; check the file signature
+        # (zip for xlsx/xlsb, OLE2 for xls) before engaging the excel machinery
+        with open(metadata_path, "rb") as maybe_workbook:
+            magic_bytes = maybe_workbook.read(2)
+        if magic_bytes not in (b"PK", b"\xd0\xcf"):
+            proper_method = "txt"
     else:
         proper_method = extension.replace(".", "")
+
+    if proper_method != "excel":
         with open(metadata_path, "r") as infile:
             first_line = infile.read()
             # check for separators in line
@@ -444,9 +453,19 @@ def open_meta_data(
         if proper_method != "excel":
             if "\t" in separators_present:
                 separator = "\t"
-            else:
+            elif "," in separators_present:
                 separator = ","
-            metadata_dataframe = use_me_to_read(metadata_path, sep=separator)
+            else:
+                separator = None
+            if separator is not None:
+                metadata_dataframe = use_me_to_read(metadata_path, sep=separator)
+            else:
+                # neither tab nor comma appears in the file; let the python
+                # engine sniff the separator (space separated files etc.) the
+                # way the failed excel parse used to
+                metadata_dataframe = use_me_to_read(
+                    metadata_path, sep=None, engine="python"
+                )
         else:
             metadata_dataframe = use_me_to_read(metadata_path, sheet_name=None)
             # check to see if there are multiple sheets in this input file
@@ -5,7 +5,11 @@ import pytest
 import pathlib
 import os
 from unittest.mock import Mock, patch
-from pypet2bids.convert_pmod_to_blood import PmodToBlood, type_cast_cli_input
+from pypet2bids.convert_pmod_to_blood import (
+    PmodToBlood,
+    loaded_pmod_file_cache,
+    type_cast_cli_input,
+)
 from pypet2bids.helper_functions import open_meta_data
 
 # resolving paths for the opening of test data, for this module test data is contained in the spreadsheet_conversion
@@ -127,6 +131,38 @@ def Ex_txt_manual_and_autosampled_mixed():
 
 
 class TestPmodToBlood:
+    def test_bld_workbook_pickle_cache(self, tmp_path, monkeypatch):
+        workbook_bld = tmp_path / "blood.bld"
+        original = pandas.DataFrame({"sec": [1, 2], "whole-blood [Bq/cc]": [3.5, 4.25]})
+        original.to_excel(workbook_bld, index=False, engine="openpyxl")
+        pickle_path = pathlib.Path(str(workbook_bld) + ".cache.pickle")
+
+        # the pickle cache is strictly opt-in; unset or any value other than "1"
+        # (notably "0") must leave it off
+        for disabled in (None, "0"):
+            if disabled is None:
+                monkeypatch.delenv("PET2BIDS_CACHE_BLOOD", raising=False)
+            else:
+                monkeypatch.setenv("PET2BIDS_CACHE_BLOOD", disabled)
+            loaded_pmod_file_cache.clear()
+            assert PmodToBlood.load_pmod_file(workbook_bld).equals(original)
+            assert not pickle_path.is_file()
+
+        monkeypatch.setenv("PET2BIDS_CACHE_BLOOD", "1")
+        loaded_pmod_file_cache.clear()
+        first_parse = PmodToBlood.load_pmod_file(workbook_bld)
+        assert pickle_path.is_file()
+
+        # a second load with a cold in-memory cache must come back from the pickle
+        loaded_pmod_file_cache.clear()
+        assert PmodToBlood.load_pmod_file(workbook_bld).equals(first_parse)
+
+        # rewriting the workbook invalidates the stale pickle via the content hash
+        updated = pandas.DataFrame({"sec": [1, 2], "whole-blood [Bq/cc]": [5.5, 6.75]})
+        updated.to_excel(workbook_bld, index=False, engine="openpyxl")
+        loaded_pmod_file_cache.clear()
+        assert PmodToBlood.load_pmod_file(workbook_bld).equals(updated)
+
     def test_load_bld_files_blood_only(self, Ex_bld_whole_blood_only_files):
         kwargs_input = {
             "whole_blood_activity_collection_method": "automatic",
@@ -216,6 +252,62 @@ class TestPmodToBlood:
                     assert "plasma_radioactivity" in manual_df.columns
                     assert "whole_blood_radioactivity" in manual_df.columns
 
+    def test_collection_method_kwargs_skip_prompt(self, Ex_bld_whole_blood_only_files):
+        kwargs_input = {
+            "whole_blood_activity_collection_method": "automatic",
+            "plasma_activity_collection_method": "manual",
+        }
+        with tempfile.TemporaryDirectory() as tempdir:
+            # with collection methods supplied as kwargs (the cli folds its
+            # --*-collection-method flags into these) nothing should prompt
+            with patch("builtins.input") as mock_input:
+                pmod_to_blood = PmodToBlood(
+                    whole_blood_activity=pathlib.Path(
+                        Ex_bld_whole_blood_only_files["whole"][0]
+                    ),
+                    plasma_activity=pathlib.Path(
+                        Ex_bld_whole_blood_only_files["plasma"][0]
+                    ),
+                    output_path=pathlib.Path(tempdir),
+                    **kwargs_input
+                )
+            mock_input.assert_not_called()
+            assert pmod_to_blood.data_collection["whole_blood_activity"] == "automatic"
+            assert pmod_to_blood.data_collection["plasma_activity"] == "manual"
+
+    def test_gzip_output_round_trip(self, Ex_bld_whole_blood_only_files):
+        kwargs_input = {
+            "whole_blood_activity_collection_method": "automatic",
+            "parent_fraction_collection_method": "automatic",
+            "plasma_activity_collection_method": "automatic",
+        }
+        with tempfile.TemporaryDirectory() as plain_dir, tempfile.TemporaryDirectory() as gzip_dir:
+            for output_path, gzip_output in ((plain_dir, False), (gzip_dir, True)):
+                PmodToBlood(
+                    whole_blood_activity=pathlib.Path(
+                        Ex_bld_whole_blood_only_files["whole"][0]
+                    ),
+                    plasma_activity=pathlib.Path(
+                        Ex_bld_whole_blood_only_files["plasma"][0]
+                    ),
+                    output_path=pathlib.Path(output_path),
+                    gzip_output=gzip_output,
+                    **kwargs_input
+                )
+
+            plain_tsvs = [f for f in os.listdir(plain_dir) if f.endswith(".tsv")]
+            assert len(plain_tsvs) >= 1
+            for plain_tsv in plain_tsvs:
+                gzipped_tsv = os.path.join(gzip_dir, plain_tsv + ".gz")
+                # the gzipped run writes .tsv.gz instead of .tsv, with identical contents
+                assert not os.path.isfile(os.path.join(gzip_dir, plain_tsv))
+                assert os.path.isfile(gzipped_tsv)
+                plain_frame = pandas.read_csv(
+                    os.path.join(plain_dir, plain_tsv), sep="\t"
+                )
+                round_tripped = pandas.read_csv(gzipped_tsv, sep="\t")
+                assert round_tripped.equals(plain_frame)
+
     def test_load_txt_files_mixed(self, Ex_txt_manual_and_autosampled_mixed):
         kwargs_input = {
             "whole_blood_activity_collection_method": "automatic",
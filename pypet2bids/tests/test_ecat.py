@@ -171,3 +171,42 @@ def test_spreadsheets_produce_valid_conversion_ecatpet2bids(tmp_path):
     )
 
     assert validate_ecat_w_spreadsheet.returncode == 0
+
+
+def test_read_ecat_cached_hit_and_staleness(tmp_path):
+    from unittest.mock import patch
+
+    from pypet2bids import ecat2nii
+
+    fake_ecat = tmp_path / "fake.v"
+    fake_ecat.write_bytes(b"not really an ecat file")
+    cache_file = pathlib.Path(str(fake_ecat) + ".cache.pickle")
+
+    reads = []
+
+    def fake_read_ecat(ecat_file):
+        reads.append(ecat_file)
+        return {"read_number": len(reads)}, [{"frame": 1}], [[1, 2], [3, 4]]
+
+    with patch.object(ecat2nii, "read_ecat", fake_read_ecat):
+        # caching is opt-in; anything other than "1" reads straight through
+        # and never writes a sidecar
+        with patch.object(ecat2nii, "ecat_cache", "0"):
+            ecat2nii._read_ecat_cached(fake_ecat)
+            assert len(reads) == 1
+            assert not cache_file.is_file()
+
+        with patch.object(ecat2nii, "ecat_cache", "1"):
+            # first read populates the sidecar, the second comes back from it
+            first = ecat2nii._read_ecat_cached(fake_ecat)
+            assert len(reads) == 2
+            assert cache_file.is_file()
+            assert ecat2nii._read_ecat_cached(fake_ecat) == first
+            assert len(reads) == 2
+
+            # an ecat file newer than its sidecar makes the cache stale
+            stale_time = cache_file.stat().st_mtime + 10
+            os.utime(fake_ecat, (stale_time, stale_time))
+            refreshed = ecat2nii._read_ecat_cached(fake_ecat)
+            assert len(reads) == 3
+            assert refreshed[0]["read_number"] == 3